@@ -0,0 +1,251 @@
+"""Size-aware execution policy for prompt analysis and improvement.
+
+Small prompts are handled inline on the calling thread. Prompts longer than
+PROMPT_INLINE_LIMIT characters are sent to a pool of warm worker processes so
+the string scanning in PromptEngine does not hold the server's GIL. The text
+travels through a shared-memory buffer rather than being pickled into the
+pipe, and a job exceeding PROMPT_ANALYSIS_TIMEOUT seconds is cancelled by
+terminating its worker, which is immediately replaced.
+
+Results come back the same way: a task's large text field (the improved
+prompt) is written to a shared-memory buffer by the worker, and only the
+small remainder of the result is pickled through the pipe.
+"""
+import dataclasses
+import multiprocessing
+import os
+import queue
+import secrets
+import threading
+import time
+from multiprocessing import shared_memory
+
+from src.prompt_engine import PromptEngine
+
+INLINE_LIMIT = int(os.environ.get('PROMPT_INLINE_LIMIT', 64 * 1024))
+MAX_PROMPT_BYTES = int(os.environ.get('PROMPT_MAX_BYTES', 8 * 1024 * 1024))
+ANALYSIS_TIMEOUT = float(os.environ.get('PROMPT_ANALYSIS_TIMEOUT', 10))
+ANALYSIS_WORKERS = int(os.environ.get('PROMPT_ANALYSIS_WORKERS', min(4, os.cpu_count() or 1)))
+
+# Each worker process builds its own engine when it imports this module
+_engine = PromptEngine()
+
+
+class PromptTooLarge(Exception):
+    """Request body exceeds MAX_PROMPT_BYTES"""
+
+    def __init__(self, limit=MAX_PROMPT_BYTES):
+        super().__init__(f'Request body too large. Maximum size is {limit} bytes')
+
+
+class AnalysisTimeout(Exception):
+    """A pooled job ran longer than its timeout and was cancelled"""
+
+    def __init__(self, timeout):
+        super().__init__(f'Prompt processing timed out after {timeout:g} seconds')
+
+
+def _analyze(engine, prompt, ai_tool, category):
+    return {
+        'analysis': engine._analyze_prompt(prompt, ai_tool, category),
+        'score': engine._score_prompt(prompt, ai_tool, category),
+        'issues': engine._identify_prompt_issues(prompt),
+        'word_count': len(prompt.split()),
+        'character_count': len(prompt)
+    }
+
+
+def _improve(engine, prompt, ai_tool, output_style, category):
+    return engine.improve_existing_prompt(
+        existing_prompt=prompt,
+        ai_tool=ai_tool,
+        output_style=output_style,
+        category=category
+    )
+
+
+TASKS = {
+    'analyze': _analyze,
+    'improve': _improve,
+}
+
+# Result fields returned through shared memory, per task. Analysis results
+# are a handful of counts and short strings, so they use the pipe directly.
+SHARED_FIELDS = {
+    'improve': 'generated_prompt',
+}
+
+
+def _share_text(text, name):
+    """Copy text into a new shared-memory segment called name, returning its size"""
+    data = text.encode('utf-8')
+    shm = shared_memory.SharedMemory(name=name, create=True, size=max(len(data), 1))
+    shm.buf[:len(data)] = data
+    shm.close()
+    return len(data)
+
+
+def _take_text(name, size):
+    """Read and free a segment created by _share_text"""
+    shm = shared_memory.SharedMemory(name=name)
+    try:
+        return str(shm.buf[:size], 'utf-8')
+    finally:
+        shm.close()
+        shm.unlink()
+
+
+def _discard(name):
+    """Free a result segment a cancelled worker may have left behind"""
+    try:
+        shm = shared_memory.SharedMemory(name=name)
+    except FileNotFoundError:
+        return
+    shm.close()
+    shm.unlink()
+
+
+def _worker_main(conn):
+    """Worker loop: read jobs from the pipe, decode text from shared memory, reply"""
+    while True:
+        try:
+            task, shm_name, size, result_name, args = conn.recv()
+        except (EOFError, KeyboardInterrupt):
+            return
+
+        shm = shared_memory.SharedMemory(name=shm_name)
+        try:
+            text = str(shm.buf[:size], 'utf-8')
+            value = TASKS[task](_engine, text, *args)
+            shared_size = None
+            field = SHARED_FIELDS.get(task)
+            if field is not None:
+                shared_size = _share_text(getattr(value, field), result_name)
+                value = dataclasses.replace(value, **{field: ''})
+            conn.send((True, value, shared_size))
+        except Exception as e:
+            conn.send((False, str(e), None))
+        finally:
+            shm.close()
+
+
+class AnalysisPool:
+    """Fixed set of pre-started worker processes, one job per worker at a time"""
+
+    def __init__(self, workers=ANALYSIS_WORKERS, timeout=ANALYSIS_TIMEOUT):
+        self.timeout = timeout
+        # spawn is safe to use from a multi-threaded server process
+        self._context = multiprocessing.get_context('spawn')
+        self._idle = queue.Queue()
+        for _ in range(workers):
+            self._idle.put(self._spawn())
+
+    def _spawn(self):
+        parent_conn, child_conn = self._context.Pipe()
+        process = self._context.Process(target=_worker_main, args=(child_conn,), daemon=True)
+        process.start()
+        child_conn.close()
+        return process, parent_conn
+
+    def _replace(self, worker):
+        process, conn = worker
+        process.terminate()
+        process.join()
+        conn.close()
+        return self._spawn()
+
+    def run(self, task, text, *args):
+        """Run a task on a worker, raising AnalysisTimeout if it takes too long.
+
+        The timeout covers waiting for a free worker and the job itself.
+        """
+        deadline = time.monotonic() + self.timeout
+        data = text.encode('utf-8')
+        try:
+            worker = self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            raise AnalysisTimeout(self.timeout)
+
+        # The result segment is named up front so it can be freed even if the
+        # worker is terminated between creating it and replying
+        result_name = f'prompt_{secrets.token_hex(8)}'
+        shm = shared_memory.SharedMemory(create=True, size=max(len(data), 1))
+        try:
+            shm.buf[:len(data)] = data
+            process, conn = worker
+            try:
+                conn.send((task, shm.name, len(data), result_name, args))
+                if not conn.poll(max(deadline - time.monotonic(), 0)):
+                    worker = self._replace(worker)
+                    _discard(result_name)
+                    raise AnalysisTimeout(self.timeout)
+                ok, value, shared_size = conn.recv()
+            except (EOFError, OSError):
+                # Worker died mid-job; replace it and report the failure
+                worker = self._replace(worker)
+                _discard(result_name)
+                raise RuntimeError('Prompt processing worker exited unexpectedly')
+        finally:
+            self._idle.put(worker)
+            shm.close()
+            shm.unlink()
+
+        if not ok:
+            raise RuntimeError(value)
+        if shared_size is not None:
+            value = dataclasses.replace(value, **{SHARED_FIELDS[task]: _take_text(result_name, shared_size)})
+        return value
+
+    def close(self):
+        while True:
+            try:
+                process, conn = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            conn.close()
+            process.join(timeout=1)
+            if process.is_alive():
+                process.terminate()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """Return the shared pool, starting its workers on first use"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = AnalysisPool()
+    return _pool
+
+
+def warm():
+    """Start the worker processes ahead of the first large prompt"""
+    get_pool()
+
+
+def shutdown():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+            _pool = None
+
+
+def _run(task, text, *args):
+    if len(text) <= INLINE_LIMIT:
+        return TASKS[task](_engine, text, *args)
+    return get_pool().run(task, text, *args)
+
+
+def analyze(prompt, ai_tool, category):
+    """Analyze, score and list issues for a prompt, offloading large ones"""
+    return _run('analyze', prompt, ai_tool, category)
+
+
+def improve(prompt, ai_tool, output_style, category):
+    """Improve an existing prompt, offloading large ones"""
+    return _run('improve', prompt, ai_tool, output_style, category)
@@ -0,0 +1,303 @@
+"""ASGI serving mode for the prompt API.
+
+Request coroutines only parse input and await work scheduled elsewhere:
+PromptEngine calls run on a bounded engine pool and every database access runs
+on a dedicated executor inside a Flask app context, so a slow client or a
+pending SQLite commit never pins an event-loop thread. Decoding large request
+bodies and encoding large responses also runs on the engine pool. Routes outside
+/api/prompts fall through to the regular Flask app.
+
+Run with ``python src/main.py --asgi`` or
+``uvicorn --factory src.asgi:app_factory``.
+"""
+import asyncio
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from functools import partial
+
+from asgiref.wsgi import WsgiToAsgi
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.responses import Response, StreamingResponse
+from starlette.routing import Mount, Route
+from werkzeug.exceptions import BadRequest, UnsupportedMediaType
+from werkzeug.http import parse_options_header
+
+from src import analysis_pool
+from src.analysis_pool import MAX_PROMPT_BYTES, AnalysisTimeout, PromptTooLarge
+from src.routes.prompt import (
+    AI_TOOLS_JSON, CATEGORIES_JSON, OUTPUT_STYLES_JSON, STREAM_MIN_ROWS, TEMPLATES_JSON, analysis_payload,
+    engine, export_payload, generation_payload, history_payload, improvement_payload,
+    missing_field, requested_variants, save_generated_prompt, stats_payload
+)
+
+ENGINE_WORKERS = int(os.environ.get('PROMPT_ENGINE_WORKERS', os.cpu_count() or 4))
+# SQLite allows a single writer, so serialize database work by default
+DB_WORKERS = int(os.environ.get('PROMPT_DB_WORKERS', 1))
+# JSON bodies above this many bytes are decoded and encoded off the event loop
+JSON_OFFLOAD_BYTES = int(os.environ.get('PROMPT_JSON_OFFLOAD_BYTES', 64 * 1024))
+
+
+def _int_arg(request, name, default):
+    """Mirror Flask's request.args.get(name, default, type=int)"""
+    try:
+        return int(request.query_params[name])
+    except (KeyError, ValueError):
+        return default
+
+
+def _is_json(request):
+    """Mirror Flask's request.is_json"""
+    mimetype, _ = parse_options_header(request.headers.get('content-type', ''))
+    return mimetype == 'application/json' or (
+        mimetype.startswith('application/') and mimetype.endswith('+json'))
+
+
+async def _read_body(request, max_bytes=MAX_PROMPT_BYTES):
+    """Stream a JSON request body, aborting as soon as it exceeds max_bytes.
+
+    Content-type and decode failures (see _decode_json) raise the same
+    werkzeug errors as Flask's request.json, so the routes report them with
+    identical messages.
+    """
+    if not _is_json(request):
+        raise UnsupportedMediaType(
+            "Did not attempt to load JSON data because the request"
+            " Content-Type was not 'application/json'."
+        )
+
+    content_length = request.headers.get('content-length')
+    if content_length and content_length.isdigit() and int(content_length) > max_bytes:
+        raise PromptTooLarge(max_bytes)
+
+    body = bytearray()
+    async for chunk in request.stream():
+        body += chunk
+        if len(body) > max_bytes:
+            raise PromptTooLarge(max_bytes)
+    return body
+
+
+def _decode_json(body, debug=False):
+    """Decode a request body; like Flask, error details only appear in debug mode"""
+    try:
+        return json.loads(body)
+    except ValueError as e:
+        if debug:
+            raise BadRequest(f"Failed to decode JSON object: {e}") from e
+        raise BadRequest() from e
+
+
+def create_asgi_app(flask_app, engine_workers=ENGINE_WORKERS, db_workers=DB_WORKERS):
+    """Wrap a configured Flask app in an ASGI app serving /api/prompts natively"""
+    engine_pool = ThreadPoolExecutor(max_workers=engine_workers, thread_name_prefix='prompt-engine')
+    db_pool = ThreadPoolExecutor(max_workers=db_workers, thread_name_prefix='prompt-db')
+
+    def in_app_context(fn, *args, **kwargs):
+        with flask_app.app_context():
+            return fn(*args, **kwargs)
+
+    async def run_engine(fn, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(engine_pool, partial(fn, *args, **kwargs))
+
+    async def run_db(fn, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(db_pool, partial(in_app_context, fn, *args, **kwargs))
+
+    async def iterate(chunks):
+        # Advance a blocking generator on the engine pool, one chunk at a time
+        loop = asyncio.get_running_loop()
+        done = object()
+        while True:
+            chunk = await loop.run_in_executor(engine_pool, next, chunks, done)
+            if chunk is done:
+                return
+            yield chunk
+
+    def json_response(body, status=200):
+        # Encode through Flask's JSON provider so bytes match the WSGI routes
+        flask_response = flask_app.json.response(body)
+        return Response(flask_response.get_data(), status_code=status,
+                        media_type=flask_response.mimetype)
+
+    async def read_json(request):
+        """Return (data, body size), decoding large bodies on the engine pool"""
+        body = await _read_body(request)
+        if len(body) > JSON_OFFLOAD_BYTES:
+            return await run_engine(_decode_json, body, flask_app.debug), len(body)
+        return _decode_json(body, flask_app.debug), len(body)
+
+    async def respond(body, status=200, large=False):
+        """Encode a response, on the engine pool when it may be large"""
+        if large:
+            return await run_engine(json_response, body, status)
+        return json_response(body, status)
+
+    def endpoint(handler):
+        async def wrapped(request):
+            try:
+                return await handler(request)
+            except PromptTooLarge as e:
+                return json_response({'error': str(e)}, 413)
+            except AnalysisTimeout as e:
+                return json_response({'error': str(e)}, 503)
+            except Exception as e:
+                return json_response({'error': str(e)}, 500)
+        return wrapped
+
+    @endpoint
+    async def generate_prompt(request):
+        data, size = await read_json(request)
+        error = missing_field(data, ['user_input', 'ai_tool', 'output_style', 'category'])
+        if error:
+            return json_response({'error': error}, 400)
+
+        user_input = data['user_input']
+        ai_tool = data['ai_tool']
+        output_style = data['output_style']
+        category = data['category']
+        seo_keywords = data.get('seo_keywords', '')
+        variants, error = requested_variants(data)
+        if error:
+            return json_response({'error': error}, 400)
+
+        result = await run_engine(
+            engine.generate_prompt,
+            user_input=user_input,
+            ai_tool=ai_tool,
+            output_style=output_style,
+            category=category,
+            seo_keywords=seo_keywords,
+            operation='generate',
+            variants=variants
+        )
+        prompt_id = await run_db(save_generated_prompt, user_input, ai_tool, output_style,
+                                 category, seo_keywords, result)
+        # Generated prompts grow with the input, so size the response by the request
+        return await respond(generation_payload(prompt_id, result, variants),
+                             large=size > JSON_OFFLOAD_BYTES)
+
+    @endpoint
+    async def improve_prompt(request):
+        data, size = await read_json(request)
+        error = missing_field(data, ['existing_prompt', 'ai_tool', 'output_style', 'category'])
+        if error:
+            return json_response({'error': error}, 400)
+
+        existing_prompt = data['existing_prompt']
+        ai_tool = data['ai_tool']
+        output_style = data['output_style']
+        category = data['category']
+
+        result = await run_engine(analysis_pool.improve, existing_prompt, ai_tool,
+                                  output_style, category)
+        prompt_id = await run_db(save_generated_prompt, existing_prompt, ai_tool, output_style,
+                                 category, '', result)
+        return await respond(improvement_payload(prompt_id, result), large=size > JSON_OFFLOAD_BYTES)
+
+    @endpoint
+    async def analyze_prompt(request):
+        data, _ = await read_json(request)
+        error = missing_field(data, ['prompt'])
+        if error:
+            return json_response({'error': error}, 400)
+
+        body = await run_engine(
+            analysis_payload,
+            data['prompt'],
+            data.get('ai_tool', 'chatgpt'),
+            data.get('category', 'content_generation')
+        )
+        return json_response(body)
+
+    @endpoint
+    async def get_templates(request):
+        return json_response({'success': True, 'data': TEMPLATES_JSON})
+
+    @endpoint
+    async def get_history(request):
+        per_page = _int_arg(request, 'per_page', 10)
+        stream = per_page >= STREAM_MIN_ROWS and hasattr(flask_app.json, 'stream_list')
+        view = request.query_params.get('view')
+        fields_param = request.query_params.get('fields')
+        body, status = await run_db(
+            history_payload,
+            page=_int_arg(request, 'page', 1),
+            per_page=per_page,
+            view=view,
+            fields_param=fields_param,
+            lazy=stream
+        )
+        if stream and status == 200:
+            # The page is already loaded; rows are serialized and encoded as streamed
+            chunks = flask_app.json.stream_list(body, ('data', 'prompts'))
+            return StreamingResponse(iterate(chunks), media_type='application/json')
+        # Full rows carry whole prompts; projected pages stay small
+        return await respond(body, status, large=not (view or fields_param))
+
+    @endpoint
+    async def get_stats(request):
+        body, status = await run_db(
+            stats_payload,
+            request.query_params.get('granularity', 'day'),
+            since=request.query_params.get('since'),
+            until=request.query_params.get('until')
+        )
+        return json_response(body, status)
+
+    @endpoint
+    async def export_prompt(request):
+        body, status = await run_db(export_payload, request.path_params['prompt_id'],
+                                    request.query_params.get('format', 'json'))
+        if isinstance(body, str):
+            return Response(body, status_code=status, headers={'Content-Type': 'text/plain'})
+        return await respond(body, status, large=True)
+
+    def static_lookup(data):
+        @endpoint
+        async def lookup(request):
+            return json_response({'success': True, 'data': data})
+        return lookup
+
+    @asynccontextmanager
+    async def lifespan(app):
+        await asyncio.get_running_loop().run_in_executor(None, analysis_pool.warm)
+        try:
+            yield
+        finally:
+            engine_pool.shutdown(wait=False, cancel_futures=True)
+            db_pool.shutdown(wait=True)
+            analysis_pool.shutdown()
+
+    routes = [
+        Mount('/api/prompts', routes=[
+            Route('/generate', generate_prompt, methods=['POST']),
+            Route('/improve', improve_prompt, methods=['POST']),
+            Route('/analyze', analyze_prompt, methods=['POST']),
+            Route('/templates', get_templates, methods=['GET']),
+            Route('/history', get_history, methods=['GET']),
+            Route('/stats', get_stats, methods=['GET']),
+            Route('/export/{prompt_id:int}', export_prompt, methods=['GET']),
+            Route('/categories', static_lookup(CATEGORIES_JSON), methods=['GET']),
+            Route('/ai-tools', static_lookup(AI_TOOLS_JSON), methods=['GET']),
+            Route('/output-styles', static_lookup(OUTPUT_STYLES_JSON), methods=['GET']),
+        ]),
+        # Users API and static files keep running on the WSGI app
+        Mount('/', app=WsgiToAsgi(flask_app)),
+    ]
+
+    return Starlette(
+        routes=routes,
+        middleware=[Middleware(CORSMiddleware, allow_origins=['*'], allow_methods=['*'], allow_headers=['*'])],
+        lifespan=lifespan
+    )
+
+
+def app_factory():
+    """Entry point for ``uvicorn --factory src.asgi:app_factory``"""
+    from src.main import create_app
+    return create_asgi_app(create_app())
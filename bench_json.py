@@ -0,0 +1,128 @@
+"""Benchmark the JSON encoding share of hot API requests.
+
+Serves generate, analyze, templates and a 100-row history page through the
+prompt routes with Flask's test client, once with Flask's stdlib provider
+(before) and once with FastJSONProvider (after). Both apps run the same routes
+against an in-memory database seeded with the same rows, so only the JSON
+provider differs. For each response the report shows the full request time
+(routing, engine, database and Response handling included) and the part of it
+spent encoding JSON.
+
+Usage: python src/bench_json.py [iterations]
+"""
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+
+from src.json_provider import FastJSONProvider, Fragment, orjson
+from src.models.user import db
+from src.routes.prompt import engine, prompt_bp, save_generated_prompt
+
+USER_INPUT = 'Write a launch announcement for our analytics dashboard aimed at data teams. ' * 4
+HISTORY_ROWS = 100
+
+
+class BaselineProvider(DefaultJSONProvider):
+    """Flask's default provider, encoding fragments from their source value as
+    the routes did before FastJSONProvider"""
+
+    encode_time = 0.0
+
+    def default(self, o):
+        if isinstance(o, Fragment):
+            return o.value
+        return super().default(o)
+
+    def dumps(self, obj, **kwargs):
+        start = time.perf_counter()
+        try:
+            return super().dumps(obj, **kwargs)
+        finally:
+            self.encode_time += time.perf_counter() - start
+
+
+class TimedFastProvider(FastJSONProvider):
+    """FastJSONProvider timing only the encoder, not the row serialization
+    that stream_list pulls from its lazy input"""
+
+    encode_time = 0.0
+
+    def _encode_bytes(self, obj):
+        start = time.perf_counter()
+        try:
+            return super()._encode_bytes(obj)
+        finally:
+            self.encode_time += time.perf_counter() - start
+
+
+def make_app(provider_class):
+    app = Flask(__name__)
+    app.json = provider_class(app)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    app.register_blueprint(prompt_bp, url_prefix='/api/prompts')
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        categories = list(engine.templates)
+        for index in range(HISTORY_ROWS):
+            category = categories[index % len(categories)]
+            result = engine.generate_prompt(USER_INPUT, 'chatgpt', 'creative', category)
+            save_generated_prompt(USER_INPUT, 'chatgpt', 'creative', category, '', result)
+    return app
+
+
+ANALYZE_PROMPT = engine.generate_prompt(USER_INPUT, 'chatgpt', 'technical', 'code_generation').generated_prompt
+
+# Request bodies are encoded once up front so the client never uses the provider
+SCENARIOS = [
+    ('generate', 'POST', '/api/prompts/generate', {
+        'user_input': USER_INPUT, 'ai_tool': 'claude', 'output_style': 'marketing',
+        'category': 'marketing', 'seo_keywords': 'analytics, dashboards'
+    }),
+    ('analyze', 'POST', '/api/prompts/analyze', {
+        'prompt': ANALYZE_PROMPT, 'ai_tool': 'chatgpt', 'category': 'code_generation'
+    }),
+    ('templates', 'GET', '/api/prompts/templates', None),
+    (f'history ({HISTORY_ROWS} rows)', 'GET', f'/api/prompts/history?per_page={HISTORY_ROWS}', None),
+]
+
+
+def measure(app, method, url, body, iterations):
+    """Return (request seconds, encode seconds) summed over iterations"""
+    client = app.test_client()
+    kwargs = {'data': json.dumps(body), 'content_type': 'application/json'} if body else {}
+    client.open(url, method=method, **kwargs).get_data()  # warm up
+
+    app.json.encode_time = 0.0
+    start = time.perf_counter()
+    for _ in range(iterations):
+        response = client.open(url, method=method, **kwargs)
+        response.get_data()
+        assert response.status_code == 200, response.get_data()
+    return time.perf_counter() - start, app.json.encode_time
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    before = make_app(BaselineProvider)
+    after = make_app(TimedFastProvider)
+
+    print(f"codec: {'orjson ' + orjson.__version__ if orjson else 'stdlib json'}, {iterations} iterations")
+    print(f"{'response':<20}{'request us before':>19}{'request us after':>18}"
+          f"{'encode us before':>18}{'encode us after':>17}{'share before':>14}{'share after':>13}")
+    for name, method, url, body in SCENARIOS:
+        request_before, encode_before = measure(before, method, url, body, iterations)
+        request_after, encode_after = measure(after, method, url, body, iterations)
+        print(f"{name:<20}{request_before / iterations * 1e6:>19.1f}{request_after / iterations * 1e6:>18.1f}"
+              f"{encode_before / iterations * 1e6:>18.1f}{encode_after / iterations * 1e6:>17.1f}"
+              f"{encode_before / request_before:>14.1%}{encode_after / request_after:>13.1%}")
+
+
+if __name__ == '__main__':
+    main()
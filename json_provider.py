@@ -0,0 +1,143 @@
+"""Pluggable JSON encoding for API responses.
+
+FastJSONProvider replaces Flask's default provider. It encodes with orjson
+when version 3.9 or later is installed and falls back to the stdlib json module
+otherwise. Both codecs understand Fragment, a value that is JSON-encoded once
+and spliced into every response verbatim, and stream_list, which encodes a
+large list response a few rows at a time.
+
+orjson writes non-ASCII characters as UTF-8 rather than \\u escapes, so output
+bytes differ between codecs while decoding to the same values.
+"""
+import json
+import itertools
+import uuid
+
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+# Fragment splicing needs orjson.Fragment (orjson 3.9+); older versions fall back too
+if orjson is not None and not hasattr(orjson, 'Fragment'):
+    orjson = None
+
+# Random per-process marker for placeholders; request data cannot forge it
+_TOKEN = uuid.uuid4().hex
+
+
+class Fragment:
+    """A value pre-encoded to JSON text once and reused across responses.
+
+    The source value is kept so providers without fragment support can
+    still encode it.
+    """
+
+    __slots__ = ('value', 'encoded')
+
+    def __init__(self, value):
+        self.value = value
+        self.encoded = json.dumps(value, sort_keys=True, separators=(',', ':'))
+
+    def __repr__(self):
+        return f'Fragment({self.encoded})'
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider with an optional fast codec and fragment splicing"""
+
+    # Rows encoded per chunk by stream_list
+    stream_batch_size = 32
+
+    def _indent(self, kwargs):
+        if 'indent' in kwargs:
+            return kwargs['indent']
+        if (self.compact is None and self._app.debug) or self.compact is False:
+            return 2
+        return None
+
+    def _orjson_default(self, o):
+        if isinstance(o, Fragment):
+            return orjson.Fragment(o.encoded)
+        return self.default(o)
+
+    def _dumps_orjson(self, obj, indent=None):
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=self._orjson_default, option=option)
+
+    def _dumps_stdlib(self, obj, **kwargs):
+        # Fragments become unique placeholder strings that are swapped for the
+        # pre-encoded text after the C encoder has run.
+        fragments = []
+
+        def default(o):
+            if isinstance(o, Fragment):
+                fragments.append(o.encoded)
+                return f'\x00{_TOKEN}:{len(fragments) - 1}\x00'
+            return self.default(o)
+
+        kwargs['default'] = default
+        kwargs.setdefault('ensure_ascii', self.ensure_ascii)
+        kwargs.setdefault('sort_keys', self.sort_keys)
+        encoded = json.dumps(obj, **kwargs)
+        for index, text in enumerate(fragments):
+            placeholder = json.dumps(f'\x00{_TOKEN}:{index}\x00', ensure_ascii=kwargs['ensure_ascii'])
+            encoded = encoded.replace(placeholder, text, 1)
+        return encoded
+
+    def dumps(self, obj, **kwargs):
+        if orjson is not None and set(kwargs) <= {'indent', 'separators'}:
+            return self._dumps_orjson(obj, self._indent(kwargs)).decode('utf-8')
+        return self._dumps_stdlib(obj, **kwargs)
+
+    def _encode_bytes(self, obj):
+        indent = self._indent({})
+        if orjson is not None:
+            return self._dumps_orjson(obj, indent)
+        if indent:
+            return self._dumps_stdlib(obj, indent=indent).encode('utf-8')
+        return self._dumps_stdlib(obj, separators=(',', ':')).encode('utf-8')
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(self._encode_bytes(obj) + b'\n', mimetype=self.mimetype)
+
+    def stream_list(self, body, path):
+        """Yield the encoded body with the list at body[path[0]][path[1]]... streamed row by row.
+
+        The envelope is encoded once around a placeholder, then rows are
+        encoded in small batches, so the full response never exists as one
+        string.
+        """
+        container = body
+        for key in path[:-1]:
+            container = container[key]
+        rows = container[path[-1]]
+
+        if self._indent({}):
+            # Pretty-printed (debug) output is not worth streaming
+            container[path[-1]] = list(rows)
+            yield self._encode_bytes(body) + b'\n'
+            return
+
+        placeholder = f'\x00{_TOKEN}:list\x00'
+        container[path[-1]] = placeholder
+        head, tail = self._encode_bytes(body).split(self._encode_bytes(placeholder), 1)
+
+        yield head + b'['
+        rows = iter(rows)
+        separator = b''
+        while True:
+            batch = list(itertools.islice(rows, self.stream_batch_size))
+            if not batch:
+                break
+            # Encode the batch as a list and drop its brackets
+            yield separator + self._encode_bytes(batch)[1:-1]
+            separator = b','
+        yield b']' + tail + b'\n'
@@ -9,39 +9,65 @@ from src.models.user import db
 from src.models.prompt import PromptTemplate, GeneratedPrompt
 from src.routes.user import user_bp
 from src.routes.prompt import prompt_bp
+from src import analysis_pool
+from src.analysis_pool import MAX_PROMPT_BYTES
+from src.json_provider import FastJSONProvider
 
-app = Flask(__name__, static_folder=os.path.join(os.path.dirname(__file__), 'static'))
-app.config['SECRET_KEY'] = 'asdf#FGSgvasgf$5$WGT'
 
-# Enable CORS for all routes
-CORS(app)
+def create_app():
+    """Build the Flask app.
 
-app.register_blueprint(user_bp, url_prefix='/api')
-app.register_blueprint(prompt_bp, url_prefix='/api/prompts')
+    Nothing is built at import time: spawned analysis workers re-import this
+    module as their __main__ and must not construct the app or create tables.
+    """
+    app = Flask(__name__, static_folder=os.path.join(os.path.dirname(__file__), 'static'))
+    app.json = FastJSONProvider(app)
+    app.config['SECRET_KEY'] = 'asdf#FGSgvasgf$5$WGT'
+    # Hard cap on request bodies, enforced while the body is streamed in
+    app.config['MAX_CONTENT_LENGTH'] = MAX_PROMPT_BYTES
 
-# uncomment if you need to use database
-app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(os.path.dirname(__file__), 'database', 'app.db')}"
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-db.init_app(app)
-with app.app_context():
-    db.create_all()
+    # Enable CORS for all routes
+    CORS(app)
 
-@app.route('/', defaults={'path': ''})
-@app.route('/<path:path>')
-def serve(path):
-    static_folder_path = app.static_folder
-    if static_folder_path is None:
-            return "Static folder not configured", 404
+    app.register_blueprint(user_bp, url_prefix='/api')
+    app.register_blueprint(prompt_bp, url_prefix='/api/prompts')
 
-    if path != "" and os.path.exists(os.path.join(static_folder_path, path)):
-        return send_from_directory(static_folder_path, path)
-    else:
-        index_path = os.path.join(static_folder_path, 'index.html')
-        if os.path.exists(index_path):
-            return send_from_directory(static_folder_path, 'index.html')
+    # uncomment if you need to use database
+    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(os.path.dirname(__file__), 'database', 'app.db')}"
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+
+    @app.route('/', defaults={'path': ''})
+    @app.route('/<path:path>')
+    def serve(path):
+        static_folder_path = app.static_folder
+        if static_folder_path is None:
+                return "Static folder not configured", 404
+
+        if path != "" and os.path.exists(os.path.join(static_folder_path, path)):
+            return send_from_directory(static_folder_path, path)
         else:
-            return "index.html not found", 404
+            index_path = os.path.join(static_folder_path, 'index.html')
+            if os.path.exists(index_path):
+                return send_from_directory(static_folder_path, 'index.html')
+            else:
+                return "index.html not found", 404
+
+    return app
 
 
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=5000, debug=True)
+    app = create_app()
+    if '--asgi' in sys.argv:
+        # Async serving mode: engine and database work run on bounded executors
+        import uvicorn
+        from src.asgi import create_asgi_app
+        uvicorn.run(create_asgi_app(app), host='0.0.0.0', port=5000)
+    else:
+        from werkzeug.serving import is_running_from_reloader
+        # Start analysis workers in the serving process, not the reloader's watcher
+        if is_running_from_reloader():
+            analysis_pool.warm()
+        app.run(host='0.0.0.0', port=5000, debug=True)
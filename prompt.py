@@ -45,4 +45,171 @@ class GeneratedPrompt(db.Model):
             'score': self.score,
             'created_at': self.created_at.isoformat()
         }
+    
+    PREVIEW_LENGTH = 150
+    PROJECTABLE_FIELDS = ('id', 'original_input', 'ai_tool', 'output_style', 'category',
+                          'seo_keywords', 'generated_prompt', 'analysis', 'score',
+                          'created_at', 'preview')
+    SUMMARY_FIELDS = ('id', 'ai_tool', 'category', 'score', 'created_at', 'preview')
+    
+    @classmethod
+    def projection(cls, fields):
+        """Build the column list for a field projection.
+
+        'preview' selects a SQL-side truncation of original_input plus a
+        'preview_truncated' flag, so the full text never leaves the database.
+        """
+        columns = []
+        for field in fields:
+            if field == 'preview':
+                columns.append(db.func.substr(cls.original_input, 1, cls.PREVIEW_LENGTH).label('preview'))
+                columns.append((db.func.length(cls.original_input) > cls.PREVIEW_LENGTH).label('preview_truncated'))
+            else:
+                columns.append(getattr(cls, field))
+        return columns
+    
+    @staticmethod
+    def projected_to_dict(row):
+        """Serialize a row returned by a projection query"""
+        data = row._asdict()
+        if data.get('created_at') is not None:
+            data['created_at'] = data['created_at'].isoformat()
+        if 'preview_truncated' in data:
+            data['preview_truncated'] = bool(data['preview_truncated'])
+        return data
+
+class PromptScoreRollup(db.Model):
+    """Pre-aggregated score statistics per time bucket and dimension combination.
+
+    Rows are updated incrementally alongside every GeneratedPrompt insert so
+    reporting never has to scan the full history table.
+    """
+    GRANULARITIES = ('hour', 'day')
+    HISTOGRAM_BINS = 10  # fixed 10-point bins covering scores 0-100
+
+    __table_args__ = (
+        db.UniqueConstraint('granularity', 'bucket_start', 'ai_tool', 'category', 'output_style',
+                            name='uq_prompt_score_rollup_bucket'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    granularity = db.Column(db.String(10), nullable=False)
+    bucket_start = db.Column(db.DateTime, nullable=False, index=True)
+    ai_tool = db.Column(db.String(50), nullable=False)
+    category = db.Column(db.String(50), nullable=False)
+    output_style = db.Column(db.String(50), nullable=False)
+    count = db.Column(db.Integer, nullable=False, default=0)
+    scored_count = db.Column(db.Integer, nullable=False, default=0)
+    score_sum = db.Column(db.Integer, nullable=False, default=0)
+    score_min = db.Column(db.Integer)
+    score_max = db.Column(db.Integer)
+    histogram = db.Column(db.Text, nullable=False, default=json.dumps([0] * HISTOGRAM_BINS))
+
+    @staticmethod
+    def bucket_for(created_at, granularity):
+        """Truncate a timestamp to the start of its hour or day bucket"""
+        if granularity == 'hour':
+            return created_at.replace(minute=0, second=0, microsecond=0)
+        return created_at.replace(hour=0, minute=0, second=0, microsecond=0)
+
+    @classmethod
+    def histogram_bin(cls, score):
+        """Map a 0-100 score onto its histogram bin index"""
+        return max(0, min(int(score) * cls.HISTOGRAM_BINS // 100, cls.HISTOGRAM_BINS - 1))
 
+    def add_score(self, score):
+        """Fold a single prompt into this bucket's running aggregates"""
+        self.count = (self.count or 0) + 1
+        if score is None:
+            return
+        self.scored_count = (self.scored_count or 0) + 1
+        self.score_sum = (self.score_sum or 0) + score
+        self.score_min = score if self.score_min is None else min(self.score_min, score)
+        self.score_max = score if self.score_max is None else max(self.score_max, score)
+        bins = json.loads(self.histogram) if self.histogram else [0] * self.HISTOGRAM_BINS
+        bins[self.histogram_bin(score)] += 1
+        self.histogram = json.dumps(bins)
+
+    @classmethod
+    def record(cls, prompt):
+        """Update the hourly and daily rollups for a new GeneratedPrompt.
+
+        Must be called in the same session as the insert, before commit, so the
+        prompt row and its rollups are persisted atomically.
+        """
+        if prompt.created_at is None:
+            prompt.created_at = datetime.utcnow()
+
+        for granularity in cls.GRANULARITIES:
+            key = {
+                'granularity': granularity,
+                'bucket_start': cls.bucket_for(prompt.created_at, granularity),
+                'ai_tool': prompt.ai_tool,
+                'category': prompt.category,
+                'output_style': prompt.output_style,
+            }
+            rollup = cls.query.filter_by(**key).first()
+            if rollup is None:
+                rollup = cls(**key)
+                db.session.add(rollup)
+            rollup.add_score(prompt.score)
+
+    @classmethod
+    def rebuild(cls, batch_size=1000):
+        """Recompute every rollup from the GeneratedPrompt history (backfill)"""
+        cls.query.delete()
+        rollups = {}
+        history = GeneratedPrompt.query.order_by(GeneratedPrompt.id).yield_per(batch_size)
+        for prompt in history:
+            for granularity in cls.GRANULARITIES:
+                key = (granularity, cls.bucket_for(prompt.created_at, granularity),
+                       prompt.ai_tool, prompt.category, prompt.output_style)
+                rollup = rollups.get(key)
+                if rollup is None:
+                    rollup = cls(granularity=key[0], bucket_start=key[1], ai_tool=key[2],
+                                 category=key[3], output_style=key[4])
+                    rollups[key] = rollup
+                rollup.add_score(prompt.score)
+        db.session.add_all(rollups.values())
+        db.session.commit()
+        return len(rollups)
+
+    @classmethod
+    def merge(cls, rollups):
+        """Combine several rollup rows into a single stats dict"""
+        count = scored_count = score_sum = 0
+        score_min = score_max = None
+        histogram = [0] * cls.HISTOGRAM_BINS
+        for rollup in rollups:
+            # Column defaults only apply on insert, so pending rows may hold None
+            count += rollup.count or 0
+            scored_count += rollup.scored_count or 0
+            score_sum += rollup.score_sum or 0
+            if rollup.score_min is not None:
+                score_min = rollup.score_min if score_min is None else min(score_min, rollup.score_min)
+            if rollup.score_max is not None:
+                score_max = rollup.score_max if score_max is None else max(score_max, rollup.score_max)
+            for i, value in enumerate(json.loads(rollup.histogram)):
+                histogram[i] += value
+        return {
+            'count': count,
+            'average_score': round(score_sum / scored_count, 2) if scored_count else None,
+            'min_score': score_min,
+            'max_score': score_max,
+            'histogram': histogram
+        }
+
+    def to_dict(self):
+        return {
+            'granularity': self.granularity,
+            'bucket_start': self.bucket_start.isoformat(),
+            'ai_tool': self.ai_tool,
+            'category': self.category,
+            'output_style': self.output_style,
+            'count': self.count,
+            'scored_count': self.scored_count,
+            'score_sum': self.score_sum,
+            'score_min': self.score_min,
+            'score_max': self.score_max,
+            'histogram': json.loads(self.histogram)
+        }
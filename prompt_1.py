@@ -1,12 +1,228 @@
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, Response, current_app, jsonify, request, stream_with_context
 from flask_cors import cross_origin
-from src.models.prompt import GeneratedPrompt, PromptTemplate, db
+from werkzeug.exceptions import RequestEntityTooLarge
+from src.models.prompt import GeneratedPrompt, PromptTemplate, PromptScoreRollup, db
 from src.prompt_engine import PromptEngine
+from src import analysis_pool
+from src.analysis_pool import AnalysisTimeout, PromptTooLarge
+from src.json_provider import Fragment
+from datetime import datetime, timedelta, timezone
+import click
 import json
 
 prompt_bp = Blueprint('prompt', __name__)
 engine = PromptEngine()
 
+MAX_VARIANTS = 20
+# /stats reads a bounded window of rollup buckets so its cost does not grow with history
+STATS_DEFAULT_WINDOW = timedelta(days=30)
+STATS_MAX_WINDOW = {'hour': timedelta(days=31), 'day': timedelta(days=366)}
+# History pages at least this large are encoded and sent row by row
+STREAM_MIN_ROWS = 50
+
+CATEGORIES = {
+    'content_generation': 'Content Generation',
+    'image_generation': 'Image Generation',
+    'code_generation': 'Code Generation',
+    'data_analysis': 'Data Analysis',
+    'marketing': 'Marketing'
+}
+
+AI_TOOLS = {
+    'chatgpt': 'ChatGPT (GPT-4)',
+    'claude': 'Claude 3',
+    'gemini': 'Google Gemini',
+    'midjourney': 'Midjourney',
+    'dalle': 'DALL-E'
+}
+
+OUTPUT_STYLES = {
+    'creative': 'Creative',
+    'technical': 'Technical',
+    'marketing': 'Marketing',
+    'research': 'Research'
+}
+
+# Static engine content, JSON-encoded once and spliced into responses
+CATEGORIES_JSON = Fragment(CATEGORIES)
+AI_TOOLS_JSON = Fragment(AI_TOOLS)
+OUTPUT_STYLES_JSON = Fragment(OUTPUT_STYLES)
+TEMPLATES_JSON = Fragment(engine.templates_dict())
+
+# The helpers below hold the route logic split into validation, engine and
+# database stages, so the WSGI routes here and the ASGI app in src/asgi.py
+# produce identical responses while scheduling each stage differently.
+
+def missing_field(data, required_fields):
+    """Return an error message for the first missing required field, if any"""
+    for field in required_fields:
+        if field not in data:
+            return f'Missing required field: {field}'
+    return None
+
+def requested_variants(data):
+    """Return (k, error) for the optional 'variants' field of a generate request"""
+    variants = data.get('variants', 0)
+    if isinstance(variants, bool) or not isinstance(variants, int) or not 0 <= variants <= MAX_VARIANTS:
+        return 0, f'variants must be an integer between 0 and {MAX_VARIANTS}'
+    adapter = engine.ai_adapters.get(str(data['ai_tool']).lower(), {})
+    if variants and not adapter.get('parameters'):
+        return 0, 'variants are only supported for image tools with parameters (midjourney)'
+    return variants, None
+
+def save_generated_prompt(original_input, ai_tool, output_style, category, seo_keywords, result):
+    """Persist an engine result with its score rollups and return the new id"""
+    generated_prompt = GeneratedPrompt(
+        original_input=original_input,
+        ai_tool=ai_tool,
+        output_style=output_style,
+        category=category,
+        seo_keywords=seo_keywords,
+        generated_prompt=result.generated_prompt,
+        analysis=result.analysis,
+        score=result.score
+    )
+    
+    db.session.add(generated_prompt)
+    PromptScoreRollup.record(generated_prompt)
+    db.session.commit()
+    return generated_prompt.id
+
+def generation_payload(prompt_id, result, variants=0):
+    data = result.to_dict()
+    if not variants:
+        # Variants are only reported when the request asked for them
+        del data['variants']
+    return {'success': True, 'data': dict(data, id=prompt_id)}
+
+def improvement_payload(prompt_id, result):
+    return {'success': True, 'data': dict(result.to_dict(), id=prompt_id)}
+
+def analysis_payload(prompt, ai_tool, category):
+    """Analyze a prompt and build the response body (engine work only)"""
+    return {
+        'success': True,
+        'data': analysis_pool.analyze(prompt, ai_tool, category)
+    }
+
+def history_payload(page, per_page, view=None, fields_param=None, lazy=False):
+    """Query a page of history and return (body, status).
+
+    With lazy=True the 'prompts' entry is a generator that serializes rows on
+    demand, for use with the provider's stream_list.
+    """
+    # Optional projection: ?view=summary or ?fields=id,score,preview
+    fields = None
+    if view == 'summary':
+        fields = list(GeneratedPrompt.SUMMARY_FIELDS)
+    elif fields_param:
+        fields = [field.strip() for field in fields_param.split(',') if field.strip()]
+        invalid = [field for field in fields if field not in GeneratedPrompt.PROJECTABLE_FIELDS]
+        if invalid:
+            return {'error': f"Invalid fields: {', '.join(invalid)}"}, 400
+        if 'id' not in fields:
+            fields.insert(0, 'id')
+    
+    query = GeneratedPrompt.query
+    if fields:
+        query = query.with_entities(*GeneratedPrompt.projection(fields))
+    
+    prompts = query.order_by(
+        GeneratedPrompt.created_at.desc()
+    ).paginate(
+        page=page,
+        per_page=per_page,
+        error_out=False
+    )
+    
+    if fields:
+        items = (GeneratedPrompt.projected_to_dict(row) for row in prompts.items)
+    else:
+        items = (prompt.to_dict() for prompt in prompts.items)
+    if not lazy:
+        items = list(items)
+    
+    return {
+        'success': True,
+        'data': {
+            'prompts': items,
+            'total': prompts.total,
+            'pages': prompts.pages,
+            'current_page': page
+        }
+    }, 200
+
+def parse_timestamp(value):
+    """Parse an ISO 8601 query value as naive UTC, matching stored timestamps"""
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+def stats_payload(granularity, since=None, until=None):
+    """Aggregate rollup rows into the stats response and return (body, status)"""
+    if granularity not in PromptScoreRollup.GRANULARITIES:
+        return {'error': 'Invalid granularity. Use hour or day'}, 400
+    
+    try:
+        until = parse_timestamp(until) if until else datetime.utcnow()
+        since = parse_timestamp(since) if since else until - STATS_DEFAULT_WINDOW
+    except ValueError:
+        return {'error': 'Invalid date. Use ISO 8601 format'}, 400
+    if since >= until:
+        return {'error': 'since must be earlier than until'}, 400
+    if until - since > STATS_MAX_WINDOW[granularity]:
+        return {'error': f'Date range too large for {granularity} granularity. '
+                         f'Maximum is {STATS_MAX_WINDOW[granularity].days} days'}, 400
+    
+    rollups = PromptScoreRollup.query.filter(
+        PromptScoreRollup.granularity == granularity,
+        PromptScoreRollup.bucket_start >= since,
+        PromptScoreRollup.bucket_start < until
+    ).order_by(PromptScoreRollup.bucket_start).all()
+    
+    def group_by(key):
+        groups = {}
+        for rollup in rollups:
+            groups.setdefault(key(rollup), []).append(rollup)
+        return groups
+    
+    return {
+        'success': True,
+        'data': {
+            'granularity': granularity,
+            'since': since.isoformat(),
+            'until': until.isoformat(),
+            'totals': PromptScoreRollup.merge(rollups),
+            'by_ai_tool': {k: PromptScoreRollup.merge(v) for k, v in group_by(lambda r: r.ai_tool).items()},
+            'by_category': {k: PromptScoreRollup.merge(v) for k, v in group_by(lambda r: r.category).items()},
+            'by_output_style': {k: PromptScoreRollup.merge(v) for k, v in group_by(lambda r: r.output_style).items()},
+            'buckets': [
+                dict(PromptScoreRollup.merge(v), bucket_start=k.isoformat())
+                for k, v in group_by(lambda r: r.bucket_start).items()
+            ],
+            'histogram_bin_width': 100 // PromptScoreRollup.HISTOGRAM_BINS
+        }
+    }, 200
+
+def export_payload(prompt_id, format_type):
+    """Load a prompt for export and return (body, status).
+    
+    The body is a dict for JSON responses and a str for plain-text exports.
+    """
+    prompt = GeneratedPrompt.query.get_or_404(prompt_id)
+    
+    if format_type == 'json':
+        return {
+            'success': True,
+            'data': prompt.to_dict()
+        }, 200
+    elif format_type == 'txt':
+        content = f"Generated Prompt:\n{prompt.generated_prompt}\n\nAnalysis:\n{prompt.analysis}\n\nScore: {prompt.score}/100"
+        return content, 200
+    else:
+        return {'error': 'Invalid format. Use json or txt'}, 400
+
 @prompt_bp.route('/generate', methods=['POST'])
 @cross_origin()
 def generate_prompt():
@@ -15,16 +231,18 @@ def generate_prompt():
         data = request.json
         
         # Validate required fields
-        required_fields = ['user_input', 'ai_tool', 'output_style', 'category']
-        for field in required_fields:
-            if field not in data:
-                return jsonify({'error': f'Missing required field: {field}'}), 400
+        error = missing_field(data, ['user_input', 'ai_tool', 'output_style', 'category'])
+        if error:
+            return jsonify({'error': error}), 400
         
         user_input = data['user_input']
         ai_tool = data['ai_tool']
         output_style = data['output_style']
         category = data['category']
         seo_keywords = data.get('seo_keywords', '')
+        variants, error = requested_variants(data)
+        if error:
+            return jsonify({'error': error}), 400
         
         # Generate the prompt
         result = engine.generate_prompt(
@@ -33,37 +251,17 @@ def generate_prompt():
             output_style=output_style,
             category=category,
             seo_keywords=seo_keywords,
-            operation='generate'
+            operation='generate',
+            variants=variants
         )
         
         # Save to database
-        generated_prompt = GeneratedPrompt(
-            original_input=user_input,
-            ai_tool=ai_tool,
-            output_style=output_style,
-            category=category,
-            seo_keywords=seo_keywords,
-            generated_prompt=result['generated_prompt'],
-            analysis=result['analysis'],
-            score=result['score']
-        )
+        prompt_id = save_generated_prompt(user_input, ai_tool, output_style, category, seo_keywords, result)
         
-        db.session.add(generated_prompt)
-        db.session.commit()
-        
-        return jsonify({
-            'success': True,
-            'data': {
-                'id': generated_prompt.id,
-                'generated_prompt': result['generated_prompt'],
-                'analysis': result['analysis'],
-                'score': result['score'],
-                'template_used': result['template_used'],
-                'ai_tool': ai_tool,
-                'category': category
-            }
-        })
+        return jsonify(generation_payload(prompt_id, result, variants))
         
+    except RequestEntityTooLarge:
+        return jsonify({'error': str(PromptTooLarge())}), 413
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -75,52 +273,27 @@ def improve_prompt():
         data = request.json
         
         # Validate required fields
-        required_fields = ['existing_prompt', 'ai_tool', 'output_style', 'category']
-        for field in required_fields:
-            if field not in data:
-                return jsonify({'error': f'Missing required field: {field}'}), 400
+        error = missing_field(data, ['existing_prompt', 'ai_tool', 'output_style', 'category'])
+        if error:
+            return jsonify({'error': error}), 400
         
         existing_prompt = data['existing_prompt']
         ai_tool = data['ai_tool']
         output_style = data['output_style']
         category = data['category']
         
-        # Improve the prompt
-        result = engine.improve_existing_prompt(
-            existing_prompt=existing_prompt,
-            ai_tool=ai_tool,
-            output_style=output_style,
-            category=category
-        )
+        # Improve the prompt (large prompts run in the analysis process pool)
+        result = analysis_pool.improve(existing_prompt, ai_tool, output_style, category)
         
         # Save to database
-        generated_prompt = GeneratedPrompt(
-            original_input=existing_prompt,
-            ai_tool=ai_tool,
-            output_style=output_style,
-            category=category,
-            seo_keywords='',
-            generated_prompt=result['generated_prompt'],
-            analysis=result['analysis'],
-            score=result['score']
-        )
-        
-        db.session.add(generated_prompt)
-        db.session.commit()
+        prompt_id = save_generated_prompt(existing_prompt, ai_tool, output_style, category, '', result)
         
-        return jsonify({
-            'success': True,
-            'data': {
-                'id': generated_prompt.id,
-                'generated_prompt': result['generated_prompt'],
-                'analysis': result['analysis'],
-                'score': result['score'],
-                'improvements_made': result['improvements_made'],
-                'ai_tool': ai_tool,
-                'category': category
-            }
-        })
+        return jsonify(improvement_payload(prompt_id, result))
         
+    except RequestEntityTooLarge:
+        return jsonify({'error': str(PromptTooLarge())}), 413
+    except AnalysisTimeout as e:
+        return jsonify({'error': str(e)}), 503
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -131,29 +304,20 @@ def analyze_prompt():
     try:
         data = request.json
         
-        if 'prompt' not in data:
-            return jsonify({'error': 'Missing required field: prompt'}), 400
-        
-        prompt = data['prompt']
-        ai_tool = data.get('ai_tool', 'chatgpt')
-        category = data.get('category', 'content_generation')
+        error = missing_field(data, ['prompt'])
+        if error:
+            return jsonify({'error': error}), 400
         
-        # Analyze the prompt
-        analysis = engine._analyze_prompt(prompt, ai_tool, category)
-        score = engine._score_prompt(prompt, ai_tool, category)
-        issues = engine._identify_prompt_issues(prompt)
-        
-        return jsonify({
-            'success': True,
-            'data': {
-                'analysis': analysis,
-                'score': score,
-                'issues': issues,
-                'word_count': len(prompt.split()),
-                'character_count': len(prompt)
-            }
-        })
+        return jsonify(analysis_payload(
+            data['prompt'],
+            data.get('ai_tool', 'chatgpt'),
+            data.get('category', 'content_generation')
+        ))
         
+    except RequestEntityTooLarge:
+        return jsonify({'error': str(PromptTooLarge())}), 413
+    except AnalysisTimeout as e:
+        return jsonify({'error': str(e)}), 503
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -162,10 +326,9 @@ def analyze_prompt():
 def get_templates():
     """Get available prompt templates"""
     try:
-        templates = engine.templates
         return jsonify({
             'success': True,
-            'data': templates
+            'data': TEMPLATES_JSON
         })
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -175,49 +338,54 @@ def get_templates():
 def get_history():
     """Get user's prompt generation history"""
     try:
-        page = request.args.get('page', 1, type=int)
         per_page = request.args.get('per_page', 10, type=int)
-        
-        prompts = GeneratedPrompt.query.order_by(
-            GeneratedPrompt.created_at.desc()
-        ).paginate(
-            page=page, 
-            per_page=per_page, 
-            error_out=False
+        stream = per_page >= STREAM_MIN_ROWS and hasattr(current_app.json, 'stream_list')
+        body, status = history_payload(
+            page=request.args.get('page', 1, type=int),
+            per_page=per_page,
+            view=request.args.get('view'),
+            fields_param=request.args.get('fields'),
+            lazy=stream
         )
+        if stream and status == 200:
+            chunks = current_app.json.stream_list(body, ('data', 'prompts'))
+            return Response(stream_with_context(chunks), mimetype='application/json')
+        return jsonify(body), status
         
-        return jsonify({
-            'success': True,
-            'data': {
-                'prompts': [prompt.to_dict() for prompt in prompts.items],
-                'total': prompts.total,
-                'pages': prompts.pages,
-                'current_page': page
-            }
-        })
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@prompt_bp.route('/stats', methods=['GET'])
+@cross_origin()
+def get_stats():
+    """Get score and volume statistics from the pre-aggregated rollups"""
+    try:
+        body, status = stats_payload(
+            request.args.get('granularity', 'day'),
+            since=request.args.get('since'),
+            until=request.args.get('until')
+        )
+        return jsonify(body), status
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@prompt_bp.cli.command('rebuild-stats')
+def rebuild_stats():
+    """Backfill the score rollups from the full prompt history"""
+    count = PromptScoreRollup.rebuild()
+    click.echo(f"Rebuilt {count} rollup buckets")
+
 @prompt_bp.route('/export/<int:prompt_id>', methods=['GET'])
 @cross_origin()
 def export_prompt(prompt_id):
     """Export a specific prompt"""
     try:
-        prompt = GeneratedPrompt.query.get_or_404(prompt_id)
-        format_type = request.args.get('format', 'json')
+        body, status = export_payload(prompt_id, request.args.get('format', 'json'))
+        if isinstance(body, str):
+            return body, status, {'Content-Type': 'text/plain'}
+        return jsonify(body), status
         
-        if format_type == 'json':
-            return jsonify({
-                'success': True,
-                'data': prompt.to_dict()
-            })
-        elif format_type == 'txt':
-            content = f"Generated Prompt:\n{prompt.generated_prompt}\n\nAnalysis:\n{prompt.analysis}\n\nScore: {prompt.score}/100"
-            return content, 200, {'Content-Type': 'text/plain'}
-        else:
-            return jsonify({'error': 'Invalid format. Use json or txt'}), 400
-            
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -226,17 +394,9 @@ def export_prompt(prompt_id):
 def get_categories():
     """Get available categories"""
     try:
-        categories = {
-            'content_generation': 'Content Generation',
-            'image_generation': 'Image Generation', 
-            'code_generation': 'Code Generation',
-            'data_analysis': 'Data Analysis',
-            'marketing': 'Marketing'
-        }
-        
         return jsonify({
             'success': True,
-            'data': categories
+            'data': CATEGORIES_JSON
         })
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -246,17 +406,9 @@ def get_categories():
 def get_ai_tools():
     """Get available AI tools"""
     try:
-        ai_tools = {
-            'chatgpt': 'ChatGPT (GPT-4)',
-            'claude': 'Claude 3',
-            'gemini': 'Google Gemini',
-            'midjourney': 'Midjourney',
-            'dalle': 'DALL-E'
-        }
-        
         return jsonify({
             'success': True,
-            'data': ai_tools
+            'data': AI_TOOLS_JSON
         })
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -266,17 +418,9 @@ def get_ai_tools():
 def get_output_styles():
     """Get available output styles"""
     try:
-        styles = {
-            'creative': 'Creative',
-            'technical': 'Technical',
-            'marketing': 'Marketing',
-            'research': 'Research'
-        }
-        
         return jsonify({
             'success': True,
-            'data': styles
+            'data': OUTPUT_STYLES_JSON
         })
     except Exception as e:
         return jsonify({'error': str(e)}), 500
-
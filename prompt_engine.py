@@ -1,12 +1,113 @@
 import re
 import json
-from typing import Dict, List, Optional
+import heapq
+import itertools
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Dict, List, Mapping, Optional, Tuple
+
+_EMPTY = MappingProxyType({})
+
+# Words that earn a specificity bonus in _score_prompt
+SPECIFIC_WORDS = ("specific", "detailed", "comprehensive", "professional", "expert")
+
+
+def _freeze(value):
+    """Recursively convert dicts to read-only mappings and lists to tuples"""
+    if isinstance(value, dict):
+        return MappingProxyType({key: _freeze(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+
+def _thaw(value):
+    """Convert a frozen structure back into plain dicts and lists"""
+    if isinstance(value, Mapping):
+        return {key: _thaw(item) for key, item in value.items()}
+    if isinstance(value, tuple):
+        return [_thaw(item) for item in value]
+    return value
+
+
+@dataclass(frozen=True, slots=True)
+class ImageVariant:
+    """One scored candidate from PromptEngine.generate_image_variants"""
+    prompt: str
+    score: int
+
+    def to_dict(self) -> Dict:
+        return {"prompt": self.prompt, "score": self.score}
+
+
+@dataclass(frozen=True, slots=True)
+class GenerationResult:
+    """Result of PromptEngine.generate_prompt"""
+    generated_prompt: str
+    analysis: str
+    score: int
+    template_used: str
+    ai_tool: str
+    category: str
+    variants: Tuple[ImageVariant, ...] = ()
+
+    def to_dict(self) -> Dict:
+        return {
+            "generated_prompt": self.generated_prompt,
+            "analysis": self.analysis,
+            "score": self.score,
+            "template_used": self.template_used,
+            "ai_tool": self.ai_tool,
+            "category": self.category,
+            "variants": [variant.to_dict() for variant in self.variants]
+        }
+
+
+@dataclass(frozen=True, slots=True)
+class ImprovementResult:
+    """Result of PromptEngine.improve_existing_prompt"""
+    generated_prompt: str
+    analysis: str
+    score: int
+    improvements_made: Tuple[str, ...]
+    ai_tool: str
+    category: str
+
+    def to_dict(self) -> Dict:
+        return {
+            "generated_prompt": self.generated_prompt,
+            "analysis": self.analysis,
+            "score": self.score,
+            "improvements_made": list(self.improvements_made),
+            "ai_tool": self.ai_tool,
+            "category": self.category
+        }
+
 
 class PromptEngine:
+    """Template-based prompt generator, scorer and improver.
+
+    All configuration (templates, components, AI adapters) is frozen into
+    read-only mappings and tuples at construction time, and no method mutates
+    engine state. A single instance can therefore be shared by every request
+    thread of a multi-threaded server without any locking (see
+    tests/test_prompt_engine.py).
+    """
+
+    __slots__ = ("templates", "components", "ai_adapters")
+
     def __init__(self):
-        self.templates = self._load_templates()
-        self.components = self._load_components()
-        self.ai_adapters = self._load_ai_adapters()
+        self.templates = _freeze(self._load_templates())
+        self.components = _freeze(self._load_components())
+        self.ai_adapters = _freeze(self._load_ai_adapters())
+
+    def templates_dict(self) -> Dict:
+        """Return a JSON-serializable deep copy of the templates.
+
+        This allocates a new structure on every call, so callers should encode
+        it once at startup rather than per request.
+        """
+        return _thaw(self.templates)
     
     def _load_templates(self) -> Dict:
         """Load base prompt templates for different categories"""
@@ -60,6 +161,21 @@ class PromptEngine:
                 "artistic": "artistic, creative, visually striking",
                 "photorealistic": "photorealistic, lifelike, natural lighting",
                 "cinematic": "cinematic lighting, dramatic composition, film-like quality"
+            },
+            "STYLE_MODIFIERS": {
+                "creative": "artistic, imaginative, unique perspective",
+                "technical": "precise, detailed, technical illustration",
+                "marketing": "professional, eye-catching, commercial quality",
+                "research": "scientific, accurate, informative visualization"
+            },
+            # Candidate values per image tool flag, default first; None omits the flag.
+            # --seed has no candidates: it only fixes the random start and never
+            # changes a prompt's score, so it is left for the user to add.
+            "IMAGE_PARAMETERS": {
+                "--ar": ["16:9", "1:1", "2:3", "3:2", None],
+                "--style": ["raw", None],
+                "--quality": ["2", "1", None],
+                "--chaos": [None, "25", "50"]
             }
         }
     
@@ -111,8 +227,12 @@ class PromptEngine:
     
     def generate_prompt(self, user_input: str, ai_tool: str, output_style: str, 
                        category: str, seo_keywords: Optional[str] = None,
-                       operation: str = "generate") -> Dict:
-        """Generate or improve a prompt based on user input"""
+                       operation: str = "generate", variants: int = 0) -> GenerationResult:
+        """Generate or improve a prompt based on user input.
+
+        For image tools that declare parameters (Midjourney), ``variants=k``
+        also returns the k best-scoring style/quality/parameter combinations.
+        """
         
         # Determine the appropriate template
         template = self.templates.get(category, self.templates["content_generation"])
@@ -121,9 +241,14 @@ class PromptEngine:
         adapter = self.ai_adapters.get(ai_tool.lower(), self.ai_adapters["chatgpt"])
         
         # Build the prompt based on AI tool type
+        image_variants = ()
         if adapter["style"] == "keyword_based":
             # For image generation tools like Midjourney
-            generated_prompt = self._generate_image_prompt(user_input, output_style, seo_keywords)
+            generated_prompt = self._generate_image_prompt(user_input, output_style, seo_keywords, adapter)
+            if variants:
+                image_variants = self.generate_image_variants(
+                    user_input, ai_tool, output_style, category, seo_keywords, variants
+                )
         else:
             # For text generation tools
             generated_prompt = self._generate_text_prompt(
@@ -136,17 +261,18 @@ class PromptEngine:
         # Score the prompt
         score = self._score_prompt(generated_prompt, ai_tool, category)
         
-        return {
-            "generated_prompt": generated_prompt,
-            "analysis": analysis,
-            "score": score,
-            "template_used": template["description"],
-            "ai_tool": ai_tool,
-            "category": category
-        }
+        return GenerationResult(
+            generated_prompt=generated_prompt,
+            analysis=analysis,
+            score=score,
+            template_used=template["description"],
+            ai_tool=ai_tool,
+            category=category,
+            variants=image_variants
+        )
     
-    def _generate_text_prompt(self, user_input: str, template: Dict, output_style: str,
-                             seo_keywords: Optional[str], operation: str, adapter: Dict) -> str:
+    def _generate_text_prompt(self, user_input: str, template: Mapping, output_style: str,
+                             seo_keywords: Optional[str], operation: str, adapter: Mapping) -> str:
         """Generate a text-based prompt for conversational AI tools"""
         
         structure = template["structure"]
@@ -205,41 +331,112 @@ class PromptEngine:
         return structure.strip()
     
     def _generate_image_prompt(self, user_input: str, output_style: str, 
-                              seo_keywords: Optional[str]) -> str:
+                              seo_keywords: Optional[str], adapter: Mapping) -> str:
         """Generate an image prompt for tools like Midjourney"""
         
-        # Extract key elements from user input
-        subject = user_input
-        
         # Add style modifiers based on output_style
-        style_modifiers = {
-            "creative": "artistic, imaginative, unique perspective",
-            "technical": "precise, detailed, technical illustration",
-            "marketing": "professional, eye-catching, commercial quality",
-            "research": "scientific, accurate, informative visualization"
-        }
-        
-        style = style_modifiers.get(output_style, "high quality, detailed")
+        style = self.components["STYLE_MODIFIERS"].get(output_style, "high quality, detailed")
         
         # Add quality modifiers
         quality = self.components["QUALITY_MODIFIERS"]["high_quality"]
         
-        # Combine elements
+        # Default value for each parameter the tool supports
+        parameters = [
+            (flag, values[0]) for flag, values in self._image_parameter_options(adapter)
+            if values[0] is not None
+        ]
+        
+        return self._compose_image_prompt(user_input, style, quality, seo_keywords, parameters)
+    
+    def _image_parameter_options(self, adapter: Mapping) -> List[Tuple[str, Tuple]]:
+        """Candidate values for each image parameter declared by the adapter"""
+        supported = adapter.get("parameters", ())
+        return [
+            (flag, values) for flag, values in self.components["IMAGE_PARAMETERS"].items()
+            if flag in supported
+        ]
+    
+    def _compose_image_prompt(self, subject: str, style: str, quality: str,
+                              seo_keywords: Optional[str], parameters) -> str:
+        """Join image prompt parts and append (flag, value) parameters"""
         prompt_parts = [subject, style, quality]
         
         # Add SEO keywords if provided
         if seo_keywords:
             prompt_parts.append(f"related to {seo_keywords}")
         
-        # Add Midjourney parameters
-        prompt = ", ".join(prompt_parts) + " --ar 16:9 --style raw --quality 2"
+        prompt = ", ".join(prompt_parts)
+        for flag, value in parameters:
+            prompt += f" {flag} {value}"
         
         return prompt
     
+    def _iter_image_variants(self, user_input: str, output_style: str,
+                             seo_keywords: Optional[str], adapter: Mapping):
+        """Lazily yield (changes, prompt) for style x quality x parameter combinations.
+
+        ``changes`` counts the choices that differ from the prompt
+        _generate_image_prompt would build (the requested style, the
+        high_quality modifier and each parameter's default), which is yielded
+        first with ``changes == 0``. Candidates over the adapter's max_length
+        are skipped.
+        """
+        style_modifiers = self.components["STYLE_MODIFIERS"]
+        requested = style_modifiers.get(output_style, "high quality, detailed")
+        styles = [requested] + [style for style in style_modifiers.values() if style != requested]
+        qualities = self.components["QUALITY_MODIFIERS"].values()
+        
+        options = self._image_parameter_options(adapter)
+        flags = [flag for flag, _ in options]
+        max_length = adapter.get("max_length")
+        
+        # itertools.product varies its last iterable fastest, so styles and
+        # quality modifiers change before flags do
+        dimensions = [list(enumerate(candidates)) for _, candidates in reversed(options)]
+        dimensions += [list(enumerate(qualities)), list(enumerate(styles))]
+        for choice in itertools.product(*dimensions):
+            changes = sum(1 for position, _ in choice if position)
+            *values, quality, style = (value for _, value in choice)
+            parameters = [(flag, value) for flag, value in zip(flags, reversed(values)) if value is not None]
+            prompt = self._compose_image_prompt(user_input, style, quality, seo_keywords, parameters)
+            if max_length is None or len(prompt) <= max_length:
+                yield changes, prompt
+    
+    def generate_image_variants(self, user_input: str, ai_tool: str, output_style: str,
+                                category: str, seo_keywords: Optional[str],
+                                k: int) -> Tuple[ImageVariant, ...]:
+        """Return the k best-scoring alternatives to the generated image prompt, best first.
+
+        Candidates are scored as they are generated and only the current top k
+        are kept in a min-heap, so the cross product is never materialized.
+        The generated prompt itself is not a variant. Scores tie often, so
+        ties go to the candidate with the fewest changes from the generated
+        prompt, then to the one enumerated first; the top variants therefore
+        each change one style, quality or parameter choice before combining
+        changes. Only adapters that declare parameters get variants.
+        """
+        adapter = self.ai_adapters.get(ai_tool.lower(), _EMPTY)
+        if k <= 0 or not adapter.get("parameters"):
+            return ()
+        
+        heap = []
+        candidates = self._iter_image_variants(user_input, output_style, seo_keywords, adapter)
+        for index, (changes, prompt) in enumerate(candidates):
+            if not changes:
+                continue
+            item = (self._score_prompt(prompt, ai_tool, category), -changes, -index, prompt)
+            if len(heap) < k:
+                heapq.heappush(heap, item)
+            elif item > heap[0]:
+                heapq.heapreplace(heap, item)
+        
+        return tuple(ImageVariant(prompt, score) for score, _, _, prompt in sorted(heap, reverse=True))
+    
     def _analyze_prompt(self, prompt: str, ai_tool: str, category: str) -> str:
         """Analyze the generated prompt and provide feedback"""
         
         analysis_points = []
+        lowered = prompt.lower()
         
         # Check structure
         if "###" in prompt or "**" in prompt:
@@ -253,19 +450,19 @@ class PromptEngine:
             analysis_points.append(f"⚠ Concise prompt with {word_count} words - consider adding more detail")
         
         # Check for role definition
-        if "role" in prompt.lower() or "expert" in prompt.lower():
+        if "role" in lowered or "expert" in lowered:
             analysis_points.append("✓ Includes clear role definition for better AI understanding")
         
         # Check for specific instructions
-        if "task" in prompt.lower() or "create" in prompt.lower():
+        if "task" in lowered or "create" in lowered:
             analysis_points.append("✓ Contains specific task instructions")
         
         # Check for output format
-        if "format" in prompt.lower() or "structure" in prompt.lower():
+        if "format" in lowered or "structure" in lowered:
             analysis_points.append("✓ Specifies desired output format")
         
         # AI-specific analysis
-        adapter = self.ai_adapters.get(ai_tool.lower(), {})
+        adapter = self.ai_adapters.get(ai_tool.lower(), _EMPTY)
         if adapter.get("style") == "keyword_based":
             analysis_points.append("✓ Optimized for image generation with descriptive keywords")
             if "--" in prompt:
@@ -286,21 +483,22 @@ class PromptEngine:
             score += 5
         
         # Structure scoring
+        upper = prompt.upper()
         if "###" in prompt:
             score += 15
-        if "ROLE" in prompt.upper():
+        if "ROLE" in upper:
             score += 10
-        if "TASK" in prompt.upper():
+        if "TASK" in upper:
             score += 10
         
         # Specificity scoring
-        specific_words = ["specific", "detailed", "comprehensive", "professional", "expert"]
-        for word in specific_words:
-            if word in prompt.lower():
+        lowered = prompt.lower()
+        for word in SPECIFIC_WORDS:
+            if word in lowered:
                 score += 2
         
         # AI tool optimization
-        adapter = self.ai_adapters.get(ai_tool.lower(), {})
+        adapter = self.ai_adapters.get(ai_tool.lower(), _EMPTY)
         if adapter.get("style") == "keyword_based" and "," in prompt:
             score += 10
         
@@ -308,7 +506,7 @@ class PromptEngine:
         return min(score, 100)
     
     def improve_existing_prompt(self, existing_prompt: str, ai_tool: str, 
-                               output_style: str, category: str) -> Dict:
+                               output_style: str, category: str) -> ImprovementResult:
         """Improve an existing prompt"""
         
         # Analyze the existing prompt
@@ -323,26 +521,27 @@ class PromptEngine:
         # Score the improved prompt
         score = self._score_prompt(improved_prompt, ai_tool, category)
         
-        return {
-            "generated_prompt": improved_prompt,
-            "analysis": analysis,
-            "score": score,
-            "improvements_made": issues,
-            "ai_tool": ai_tool,
-            "category": category
-        }
+        return ImprovementResult(
+            generated_prompt=improved_prompt,
+            analysis=analysis,
+            score=score,
+            improvements_made=tuple(issues),
+            ai_tool=ai_tool,
+            category=category
+        )
     
     def _identify_prompt_issues(self, prompt: str) -> List[str]:
         """Identify issues with an existing prompt"""
         issues = []
+        lowered = prompt.lower()
         
         if len(prompt.split()) < 10:
             issues.append("Too brief - needs more detail")
         
-        if not any(word in prompt.lower() for word in ["you are", "role", "expert", "specialist"]):
+        if not any(word in lowered for word in ("you are", "role", "expert", "specialist")):
             issues.append("Missing role definition")
         
-        if not any(word in prompt.lower() for word in ["create", "generate", "write", "task"]):
+        if not any(word in lowered for word in ("create", "generate", "write", "task")):
             issues.append("Unclear task definition")
         
         if "###" not in prompt and "**" not in prompt:
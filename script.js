@@ -5,6 +5,117 @@ let currentTab = 'generate';
 // API Base URL
 const API_BASE = '/api/prompts';
 
+// Cache of full history rows keyed by id. Ids can be reused after the
+// database is reset, so an entry is only used when its created_at matches
+// the summary row currently shown in the history list. IndexedDB keeps
+// entries across page loads; both layers evict the least recently cached.
+const promptCache = {
+    MAX_MEMORY_ENTRIES: 100,
+    MAX_STORED_ENTRIES: 500,
+    memory: new Map(),
+    pending: new Map(),
+    versions: new Map(),
+    dbPromise: null,
+    
+    // Record the created_at of each summary row so cached rows can be validated
+    remember(prompts) {
+        prompts.forEach(prompt => this.versions.set(prompt.id, prompt.created_at));
+    },
+    
+    isCurrent(prompt) {
+        return Boolean(prompt) && prompt.created_at === this.versions.get(prompt.id);
+    },
+    
+    openDb() {
+        if (!this.dbPromise) {
+            this.dbPromise = new Promise((resolve) => {
+                if (!window.indexedDB) {
+                    resolve(null);
+                    return;
+                }
+                const request = indexedDB.open('prompt-assistant', 2);
+                request.onupgradeneeded = () => {
+                    const db = request.result;
+                    if (db.objectStoreNames.contains('prompts')) {
+                        db.deleteObjectStore('prompts');
+                    }
+                    const store = db.createObjectStore('prompts', { keyPath: 'prompt.id' });
+                    store.createIndex('cachedAt', 'cachedAt');
+                };
+                request.onsuccess = () => resolve(request.result);
+                request.onerror = () => resolve(null);
+            });
+        }
+        return this.dbPromise;
+    },
+    
+    async readDb(promptId) {
+        const db = await this.openDb();
+        if (!db) return null;
+        return new Promise((resolve) => {
+            const request = db.transaction('prompts', 'readonly').objectStore('prompts').get(promptId);
+            request.onsuccess = () => resolve(request.result ? request.result.prompt : null);
+            request.onerror = () => resolve(null);
+        });
+    },
+    
+    async writeDb(prompt) {
+        const db = await this.openDb();
+        if (!db) return;
+        const store = db.transaction('prompts', 'readwrite').objectStore('prompts');
+        store.put({ prompt, cachedAt: Date.now() });
+        
+        // Evict the oldest entries once the store grows past its limit
+        const countRequest = store.count();
+        countRequest.onsuccess = () => {
+            let excess = countRequest.result - this.MAX_STORED_ENTRIES;
+            if (excess <= 0) return;
+            store.index('cachedAt').openCursor().onsuccess = (event) => {
+                const cursor = event.target.result;
+                if (cursor && excess > 0) {
+                    cursor.delete();
+                    excess--;
+                    cursor.continue();
+                }
+            };
+        };
+    },
+    
+    rememberInMemory(prompt) {
+        this.memory.delete(prompt.id);
+        this.memory.set(prompt.id, prompt);
+        if (this.memory.size > this.MAX_MEMORY_ENTRIES) {
+            this.memory.delete(this.memory.keys().next().value);
+        }
+    },
+    
+    async get(promptId) {
+        const cached = this.memory.get(promptId);
+        if (this.isCurrent(cached)) {
+            return cached;
+        }
+        if (!this.pending.has(promptId)) {
+            this.pending.set(promptId, this.load(promptId).finally(() => this.pending.delete(promptId)));
+        }
+        return this.pending.get(promptId);
+    },
+    
+    async load(promptId) {
+        let prompt = await this.readDb(promptId);
+        if (!this.isCurrent(prompt)) {
+            const response = await fetch(`${API_BASE}/export/${promptId}?format=json`);
+            const result = await response.json();
+            if (!result.success) {
+                throw new Error(result.error || 'Failed to load prompt');
+            }
+            prompt = result.data;
+            this.writeDb(prompt);
+        }
+        this.rememberInMemory(prompt);
+        return prompt;
+    }
+};
+
 // DOM Elements
 const elements = {
     // Navigation
@@ -491,10 +602,11 @@ function downloadFile(content, filename, mimeType) {
 
 async function loadHistory() {
     try {
-        const response = await fetch(`${API_BASE}/history?per_page=20`);
+        const response = await fetch(`${API_BASE}/history?per_page=20&view=summary`);
         const result = await response.json();
         
         if (result.success) {
+            promptCache.remember(result.data.prompts);
             displayHistory(result.data.prompts);
         } else {
             throw new Error(result.error || 'Failed to load history');
@@ -517,7 +629,7 @@ function displayHistory(prompts) {
     }
     
     elements.historyContent.innerHTML = prompts.map(prompt => `
-        <div class="history-item" onclick="loadHistoryItem(${prompt.id})">
+        <div class="history-item" onclick="loadHistoryItem(${prompt.id})" onmouseenter="prefetchHistoryItem(${prompt.id})">
             <div class="history-item-header">
                 <div class="history-item-meta">
                     <span><i class="fas fa-robot"></i> ${prompt.ai_tool}</span>
@@ -529,24 +641,22 @@ function displayHistory(prompts) {
                 </span>
             </div>
             <div class="history-item-preview">
-                ${prompt.original_input.substring(0, 150)}${prompt.original_input.length > 150 ? '...' : ''}
+                ${prompt.preview}${prompt.preview_truncated ? '...' : ''}
             </div>
         </div>
     `).join('');
 }
 
+function prefetchHistoryItem(promptId) {
+    promptCache.get(promptId).catch(() => {});
+}
+
 async function loadHistoryItem(promptId) {
     try {
-        const response = await fetch(`${API_BASE}/export/${promptId}?format=json`);
-        const result = await response.json();
-        
-        if (result.success) {
-            currentPromptId = promptId;
-            displayResults(result.data);
-            showToast('Historical prompt loaded!', 'success');
-        } else {
-            throw new Error(result.error || 'Failed to load prompt');
-        }
+        const prompt = await promptCache.get(promptId);
+        currentPromptId = promptId;
+        displayResults(prompt);
+        showToast('Historical prompt loaded!', 'success');
     } catch (error) {
         console.error('Load history item error:', error);
         showToast('Failed to load prompt.', 'error');
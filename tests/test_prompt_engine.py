@@ -0,0 +1,129 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from src.prompt_engine import PromptEngine
+
+GENERATE_CASES = [
+    (user_input, ai_tool, output_style, category)
+    for user_input in ("a short idea", "Write a detailed product launch plan for our new app. " * 20)
+    for ai_tool in ("chatgpt", "claude", "midjourney", "dalle")
+    for output_style in ("creative", "technical", "marketing", "research")
+    for category in ("content_generation", "image_generation", "code_generation")
+]
+
+IMPROVE_CASES = [
+    (existing_prompt, ai_tool, output_style)
+    for existing_prompt in ("write a poem", "You are an expert. ### TASK\nCreate a plan. Be specific. Thanks.")
+    for ai_tool in ("chatgpt", "gemini")
+    for output_style in ("creative", "research")
+]
+
+
+def _generate(engine, case):
+    user_input, ai_tool, output_style, category = case
+    return engine.generate_prompt(user_input, ai_tool, output_style, category, "seo, keywords")
+
+
+def _improve(engine, case):
+    existing_prompt, ai_tool, output_style = case
+    return engine.improve_existing_prompt(existing_prompt, ai_tool, output_style, "content_generation")
+
+
+def test_shared_engine_matches_single_threaded_results():
+    engine = PromptEngine()
+    expected_generate = [_generate(engine, case) for case in GENERATE_CASES]
+    expected_improve = [_improve(engine, case) for case in IMPROVE_CASES]
+
+    # Repeat each case many times and interleave them across threads
+    rounds = 20
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        generated = list(pool.map(lambda case: _generate(engine, case), GENERATE_CASES * rounds))
+        improved = list(pool.map(lambda case: _improve(engine, case), IMPROVE_CASES * rounds))
+
+    assert generated == expected_generate * rounds
+    assert improved == expected_improve * rounds
+
+
+@pytest.mark.parametrize("attribute", ["templates", "components", "ai_adapters"])
+def test_configuration_rejects_mutation(attribute):
+    engine = PromptEngine()
+    config = getattr(engine, attribute)
+    key = next(iter(config))
+
+    with pytest.raises(TypeError):
+        config["new"] = {}
+    with pytest.raises(TypeError):
+        del config[key]
+    with pytest.raises(TypeError):
+        config[key]["new"] = "value"
+
+
+def test_engine_attributes_cannot_be_added():
+    engine = PromptEngine()
+    with pytest.raises(AttributeError):
+        engine.cache = {}
+
+
+def test_results_are_immutable():
+    result = PromptEngine().generate_prompt("a cat", "chatgpt", "creative", "content_generation")
+    with pytest.raises(AttributeError):
+        result.score = 0
+
+
+def _ranked_variants(engine, user_input, k):
+    """Brute-force reference for generate_image_variants"""
+    adapter = engine.ai_adapters["midjourney"]
+    candidates = engine._iter_image_variants(user_input, "creative", None, adapter)
+    ranked = sorted(
+        ((engine._score_prompt(prompt, "midjourney", "image_generation"), -changes, -index, prompt)
+         for index, (changes, prompt) in enumerate(candidates) if changes),
+        reverse=True
+    )
+    return [(prompt, score) for score, _, _, prompt in ranked[:k]]
+
+
+@pytest.mark.parametrize("k", [1, 5, 20])
+def test_image_variants_match_full_ranking(k):
+    engine = PromptEngine()
+    variants = engine.generate_image_variants("a cat on a roof", "midjourney", "creative",
+                                              "image_generation", None, k)
+
+    assert [(variant.prompt, variant.score) for variant in variants] == _ranked_variants(engine, "a cat on a roof", k)
+    assert [variant.score for variant in variants] == sorted((variant.score for variant in variants), reverse=True)
+
+
+def test_image_variants_are_distinct_alternatives():
+    engine = PromptEngine()
+    result = engine.generate_prompt("a cat on a roof", "midjourney", "creative", "image_generation", variants=20)
+    prompts = [variant.prompt for variant in result.variants]
+
+    assert len(prompts) == 20
+    assert len(set(prompts)) == 20
+    assert result.generated_prompt not in prompts
+    # Ties prefer single changes, so every varied flag shows up
+    assert any("--chaos" in prompt for prompt in prompts)
+    assert any("--ar 1:1" in prompt for prompt in prompts)
+
+
+def test_image_variants_respect_max_length():
+    engine = PromptEngine()
+    max_length = engine.ai_adapters["midjourney"]["max_length"]
+    user_input = "a lighthouse on a cliff at dusk " * 12
+
+    # Long enough that only some combinations fit
+    fitting = list(engine._iter_image_variants(user_input, "creative", None, engine.ai_adapters["midjourney"]))
+    assert 0 < len(fitting) < 4 * 4 * 5 * 2 * 3 * 3
+
+    variants = engine.generate_image_variants(user_input, "midjourney", "creative", "image_generation", None, 20)
+    assert len(variants) == 20
+    assert all(len(variant.prompt) <= max_length for variant in variants)
+
+    too_long = "x" * max_length
+    assert engine.generate_image_variants(too_long, "midjourney", "creative", "image_generation", None, 5) == ()
+
+
+def test_image_variants_need_declared_parameters():
+    engine = PromptEngine()
+    assert engine.generate_image_variants("a cat", "dalle", "creative", "image_generation", None, 5) == ()
+    assert engine.generate_image_variants("a cat", "midjourney", "creative", "image_generation", None, 0) == ()
@@ -0,0 +1,50 @@
+import pytest
+from flask import Flask
+
+from src.models.user import db
+from src.routes.prompt import MAX_VARIANTS, prompt_bp
+
+
+@pytest.fixture
+def client():
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    app.register_blueprint(prompt_bp, url_prefix='/api/prompts')
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        yield app.test_client()
+        db.session.remove()
+        db.drop_all()
+
+
+def _generate(client, ai_tool='midjourney', **extra):
+    return client.post('/api/prompts/generate', json=dict({
+        'user_input': 'a cat on a roof',
+        'ai_tool': ai_tool,
+        'output_style': 'creative',
+        'category': 'image_generation'
+    }, **extra))
+
+
+@pytest.mark.parametrize('variants', [-1, MAX_VARIANTS + 1, True, '3', 2.5, None])
+def test_generate_rejects_invalid_variants(client, variants):
+    response = _generate(client, variants=variants)
+    assert response.status_code == 400
+    assert response.json['error'] == f'variants must be an integer between 0 and {MAX_VARIANTS}'
+
+
+@pytest.mark.parametrize('ai_tool', ['dalle', 'chatgpt'])
+def test_generate_rejects_variants_for_tools_without_parameters(client, ai_tool):
+    response = _generate(client, ai_tool=ai_tool, variants=3)
+    assert response.status_code == 400
+    assert 'only supported' in response.json['error']
+
+
+def test_generate_returns_requested_variants(client):
+    response = _generate(client, variants=3)
+    assert response.status_code == 200
+    assert len(response.json['data']['variants']) == 3
+
+    response = _generate(client)
+    assert 'variants' not in response.json['data']
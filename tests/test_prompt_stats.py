@@ -0,0 +1,127 @@
+import json
+from datetime import datetime, timedelta
+
+import pytest
+from flask import Flask
+
+from src.models.user import db
+from src.models.prompt import GeneratedPrompt, PromptScoreRollup
+from src.routes.prompt import stats_payload
+
+
+@pytest.fixture
+def app():
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+def _prompt(created_at, score, ai_tool='chatgpt', category='marketing', output_style='creative'):
+    return GeneratedPrompt(
+        original_input='input',
+        ai_tool=ai_tool,
+        output_style=output_style,
+        category=category,
+        generated_prompt='prompt',
+        score=score,
+        created_at=created_at
+    )
+
+
+def _rollup(*scores):
+    rollup = PromptScoreRollup(histogram='[0, 0, 0, 0, 0, 0, 0, 0, 0, 0]')
+    for score in scores:
+        rollup.add_score(score)
+    return rollup
+
+
+def _snapshot():
+    rollups = PromptScoreRollup.query.order_by(
+        PromptScoreRollup.granularity, PromptScoreRollup.bucket_start,
+        PromptScoreRollup.ai_tool, PromptScoreRollup.category, PromptScoreRollup.output_style
+    ).all()
+    return [rollup.to_dict() for rollup in rollups]
+
+
+def test_add_score_tracks_aggregates_and_histogram():
+    rollup = _rollup(0, 55, 100, None)
+
+    assert rollup.count == 4
+    assert rollup.scored_count == 3
+    assert rollup.score_sum == 155
+    assert (rollup.score_min, rollup.score_max) == (0, 100)
+    assert json.loads(rollup.histogram) == [1, 0, 0, 0, 0, 1, 0, 0, 0, 1]
+
+
+def test_merge_combines_rollups():
+    merged = PromptScoreRollup.merge([_rollup(40, 60), _rollup(90), _rollup(None)])
+
+    assert merged == {
+        'count': 4,
+        'average_score': 63.33,
+        'min_score': 40,
+        'max_score': 90,
+        'histogram': [0, 0, 0, 0, 1, 0, 1, 0, 0, 1]
+    }
+
+
+def test_merge_of_nothing_is_empty():
+    merged = PromptScoreRollup.merge([])
+
+    assert merged['count'] == 0
+    assert merged['average_score'] is None
+    assert merged['min_score'] is None and merged['max_score'] is None
+
+
+def test_rebuild_matches_incremental_record(app):
+    start = datetime(2026, 10, 1, 9, 15)
+    prompts = [
+        _prompt(start, 80),
+        _prompt(start + timedelta(minutes=30), 95),
+        _prompt(start + timedelta(hours=1), 40, ai_tool='claude'),
+        _prompt(start + timedelta(days=1), None, output_style='technical'),
+    ]
+    for prompt in prompts:
+        db.session.add(prompt)
+        PromptScoreRollup.record(prompt)
+        db.session.commit()
+    incremental = _snapshot()
+
+    assert PromptScoreRollup.rebuild() == len(incremental)
+    assert _snapshot() == incremental
+
+    hourly = [row for row in incremental if row['granularity'] == 'hour']
+    assert [row['count'] for row in hourly] == [2, 1, 1]
+    assert hourly[0]['score_sum'] == 175
+
+
+def test_stats_window_limits(app):
+    assert stats_payload('week')[1] == 400
+    assert stats_payload('day', since='yesterday')[1] == 400
+    assert stats_payload('day', since='2026-10-02', until='2026-10-01')[1] == 400
+
+    body, status = stats_payload('hour', since='2026-09-01', until='2026-10-15')
+    assert status == 400
+    assert 'Maximum is 31 days' in body['error']
+    assert stats_payload('day', since='2026-09-01', until='2026-10-15')[1] == 200
+
+
+def test_stats_accepts_utc_offsets(app):
+    prompt = _prompt(datetime(2026, 10, 1, 12, 30), 70)
+    db.session.add(prompt)
+    PromptScoreRollup.record(prompt)
+    db.session.commit()
+
+    body, status = stats_payload('hour', since='2026-10-01T00:00:00Z', until='2026-10-01T14:00:00+02:00')
+    assert status == 200
+    assert body['data']['since'] == '2026-10-01T00:00:00'
+    assert body['data']['until'] == '2026-10-01T12:00:00'
+    assert body['data']['totals']['count'] == 0
+
+    body, status = stats_payload('hour', since='2026-10-01T00:00:00Z', until='2026-10-01T15:00:00+02:00')
+    assert body['data']['totals']['count'] == 1